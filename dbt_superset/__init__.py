@@ -49,9 +49,26 @@ def push_descriptions(dbt_project_dir: str = typer.Option('.', help="Directory p
                                                                                 "the push."),
                       superset_pause_after_update: int = typer.Option(2, help="Number of seconds for which the "
                                                                               "script pauses after any update of "
-                                                                              "Superset columns. This is to allow "
+                                                                              "Superset columns (refreshes and "
+                                                                              "description PUTs). This is to allow "
                                                                               "databases to catch up in "
-                                                                              "the meantime."),
+                                                                              "the meantime. Only applies with "
+                                                                              "--superset-fixed-pause, otherwise "
+                                                                              "the script goes on as soon as "
+                                                                              "Superset responds."),
+                      superset_fixed_pause: bool = typer.Option(False, help="Whether to pause for "
+                                                                            "--superset-pause-after-update after "
+                                                                            "every column refresh and description "
+                                                                            "PUT instead of relying on Superset "
+                                                                            "responses."),
+                      superset_cache: bool = typer.Option(False, help="Whether to cache the Superset state of datasets "
+                                                                      "in PROJECT_DIR/.dbt-superset-cache.json and "
+                                                                      "reuse it for datasets unchanged in Superset "
+                                                                      "since the previous run."),
+                      concurrency: int = typer.Option(1, help="Number of datasets (and dataset list pages) to "
+                                                              "process in parallel. "
+                                                              "Column refreshes still run one at a time with "
+                                                              "--superset-fixed-pause."),
                       default_descriptions_yaml_path: str = typer.Option(None,
                                                                          help="Yaml file with list of column and "
                                                                          "their descriptions which allows to set default "
@@ -63,7 +80,8 @@ def push_descriptions(dbt_project_dir: str = typer.Option('.', help="Directory p
 
     push_descriptions_main(dbt_project_dir, dbt_db_name, superset_url, superset_db_id,
                            dataset_filter, superset_refresh_columns, superset_pause_after_update,
-                           default_descriptions_yaml_path, username, password)
+                           default_descriptions_yaml_path, username, password, concurrency,
+                           superset_fixed_pause, superset_cache)
 
 
 if __name__ == '__main__':
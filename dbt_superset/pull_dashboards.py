@@ -11,6 +11,7 @@ from .superset_api import Superset
 
 logging.basicConfig(format='%(asctime)s - %(levelname)s - %(message)s', level=logging.INFO)
 logging.getLogger('sqlfluff').setLevel(level=logging.WARNING)
+logger = logging.getLogger(__name__)
 
 
 def crawl_recursive(seq, key):
@@ -61,10 +62,10 @@ def get_tables_from_sql(sql, dialect):
     except (sqlfluff.core.errors.SQLParseError,
             sqlfluff.core.errors.SQLLexError,
             sqlfluff.api.simple.APIParsingError) as e:
-        logging.warning("Parsing SQL through sqlfluff failed. "
-                        "Let me attempt this via regular expressions at least and "
-                        "check the problematic query and error below.\n%s",
-                        sql, exc_info=e)
+        logger.warning("Parsing SQL through sqlfluff failed. "
+                       "Let me attempt this via regular expressions at least and "
+                       "check the problematic query and error below.\n%s",
+                       sql, exc_info=e)
         tables = get_tables_from_sql_simple(sql)
 
     tables = list(tables)  # turn set back into list
@@ -107,11 +108,11 @@ def get_tables_from_dbt(dbt_manifest, dbt_db_name):
 
 
 def get_dashboards_from_superset(superset, superset_url, superset_dashboard_url, superset_db_id):
-    logging.info(f"Getting published dashboards for db id: {superset_db_id}")
+    logger.info("Getting published dashboards for db id: %s", superset_db_id)
     page_number = 0
     dashboards_id = []
     while True:
-        logging.info("Getting page %d.", page_number + 1)
+        logger.info("Getting page %d.", page_number + 1)
 
         payload = {
             'q': json.dumps({
@@ -132,13 +133,13 @@ def get_dashboards_from_superset(superset, superset_url, superset_dashboard_url,
 
     assert dashboards_id, "There are no published dashboards in Superset!"
 
-    logging.info("There are %d published dashboards in Superset.", len(dashboards_id))
+    logger.info("There are %d published dashboards in Superset.", len(dashboards_id))
 
     dashboards = []
     dashboards_datasets_w_db = set()
     for i, d in enumerate(dashboards_id):
         try:
-            logging.info("Getting info for dashboard %d/%d.", i + 1, len(dashboards_id))
+            logger.info("Getting info for dashboard %d/%d.", i + 1, len(dashboards_id))
             res_dashboard = superset.request('GET', f'/dashboard/{d}')
             result_dashboard = res_dashboard['result']
 
@@ -147,7 +148,7 @@ def get_dashboards_from_superset(superset, superset_url, superset_dashboard_url,
             url = superset_dashboard_url + '/superset/dashboard/' + str(dashboard_id)
             owner_name = result_dashboard['owners'][0]['first_name'] + ' ' + result_dashboard['owners'][0]['last_name']
 
-            logging.info("Getting info about dashboard's datasets.")
+            logger.info("Getting info about dashboard's datasets.")
             res_datasets = superset.request('GET', f'/dashboard/{d}/datasets')
             result_datasets = res_datasets['result']
 
@@ -173,8 +174,8 @@ def get_dashboards_from_superset(superset, superset_url, superset_dashboard_url,
             }
             dashboards.append(dashboard)
         except HTTPError as e:
-            logging.error("Info about the dashboard with ID=%d wasn't (fully) obtained. "
-                          "Check the error below.", d, exc_info=e)
+            logger.error("Info about the dashboard with ID=%d wasn't (fully) obtained. "
+                         "Check the error below.", d, exc_info=e)
 
     # test if unique when database disregarded
     # loop to get the name of duplicated dataset and work with unique set of datasets w db
@@ -195,11 +196,11 @@ def get_dashboards_from_superset(superset, superset_url, superset_dashboard_url,
 
 def get_datasets_from_superset(superset, dashboards_datasets, dbt_tables,
                                sql_dialect, superset_db_id):
-    logging.info(f"Getting datasets info for db id: {superset_db_id}")
+    logger.info("Getting datasets info for db id: %s", superset_db_id)
     page_number = 0
     datasets = {}
     while True:
-        logging.info("Getting page %d.", page_number + 1)
+        logger.info("Getting page %d.", page_number + 1)
 
         payload = {
             'q': json.dumps({
@@ -226,7 +227,7 @@ def get_datasets_from_superset(superset, dashboards_datasets, dbt_tables,
                     if kind == 'virtual':  # built on custom sql
                         # rags: skip virtual tables as columns may not be
                         # standardised
-                        logging.warn(f"Skipping virtual dataset {dataset_key}")
+                        logger.warning("Skipping virtual dataset %s", dataset_key)
                         continue
 
                         sql = r['sql']
@@ -315,7 +316,7 @@ def main(dbt_project_dir, exposures_path, dbt_db_name,
 
     superset_dashboard_url = superset_dashboard_url or superset_url
 
-    logging.info("Starting the script!")
+    logger.info("Starting the script!")
 
     superset = Superset(superset_url + '/api/v1',
                         username=username, password=password)
@@ -363,5 +364,6 @@ def main(dbt_project_dir, exposures_path, dbt_db_name,
     with open(exposures_yaml_path, 'w+', encoding='utf-8') as f:
         exposures_yaml_file.dump(exposures_yaml_schema, f)
 
-    logging.info("Transferred into a YAML file at %s.", exposures_yaml_path)
-    logging.info("All done!")
+    logger.info("Transferred into a YAML file at %s.", exposures_yaml_path)
+    superset.close()
+    logger.info("All done!")
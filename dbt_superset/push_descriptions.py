@@ -1,95 +1,170 @@
+import collections
+import functools
+import html.parser
 import json
 import logging
+import math
+import os
 import re
 import time
 import ruamel.yaml
 import pathlib
 
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+
 from markdown import markdown
 from requests import HTTPError
 
 from .superset_api import Superset
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
 logging.basicConfig(format='%(asctime)s - %(levelname)s - %(message)s', level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# patterns used by convert_markdown_to_plain_text, compiled once
+_WS_RE = re.compile(r'\s+')
+_PRE_RE = re.compile(r'<pre>(.*?)</pre>')
+_TEXT_FIXES = {
+    '→': '->',
+    '<null>': '"null"',
+}
+_TEXT_FIXES_RE = re.compile('|'.join(re.escape(k) for k in _TEXT_FIXES))
+
+# rison-style ``q`` parameter of paginated list endpoints, only the page number varies
+_PAGE_QUERY_TEMPLATE = '{{"page":{},"page_size":{}}}'
+
+
+def get_datasets_from_superset(superset, superset_db_id, dataset_filter=None, concurrency=1):
+    logger.info("Getting physical datasets from Superset.")
+
+    page_size = 100
+
+    def get_page(page_number):
+        logger.info("Getting page %d.", page_number + 1)
 
+        payload = {'q': _PAGE_QUERY_TEMPLATE.format(page_number, page_size)}
+        return superset.request('GET', '/dataset/', params=payload)
 
-def get_datasets_from_superset(superset, superset_db_id, dataset_filter=None):
-    logging.info("Getting physical datasets from Superset.")
-
-    page_number = 0
-    datasets = []
-    datasets_keys = set()
-    while True:
-        logging.info("Getting page %d.", page_number + 1)
-
-        payload = {
-            'q': json.dumps({
-                'page': page_number,
-                'page_size': 100
-            })
-        }
-        res = superset.request('GET', '/dataset/', params=payload)
-
-        result = res['result']
-        if result:
-            for r in result:
-                kind = r['kind']
-                database_id = r['database']['id']
-
-                if kind == 'physical' \
-                        and (superset_db_id is None or database_id == superset_db_id):
-
-                    dataset_id = r['id']
-
-                    name = r['table_name']
-                    schema = r['schema']
-                    dataset_key = f'{schema}.{name}'  # used as unique identifier
-
-                    if dataset_filter and dataset_filter not in dataset_key:
-                        logging.info(f"Skipping {dataset_key} for db id {dataset_id} due to schema filter: `{dataset_filter}`")
-                        continue
-                    else:
-                        logging.info(f"Matched {dataset_key} for db id {dataset_id} due to schema filter: `{dataset_filter}`")
-
-                    dataset_dict = {
-                        'id': dataset_id,
-                        'key': dataset_key
-                    }
-
-                    # fail if it breaks uniqueness constraint
-                    assert dataset_key not in datasets_keys, \
-                        f"Dataset {dataset_key} is a duplicate name (schema + table) " \
-                        "across databases. " \
-                        "This would result in incorrect matching between Superset and dbt. " \
-                        "To fix this, remove duplicates or add the ``superset_db_id`` argument."
-
-                    datasets_keys.add(dataset_key)
-                    datasets.append(dataset_dict)
-            page_number += 1
+    # the first page tells the total count, the remaining pages are then fetched (concurrently if allowed)
+    res = get_page(0)
+    results = [res['result']]
+    if 'count' in res:
+        pages_count = math.ceil(res['count'] / page_size)
+        if pages_count > 1 and concurrency > 1:
+            with ThreadPoolExecutor(max_workers=min(8, concurrency)) as executor:
+                results.extend(executor.map(lambda p: get_page(p)['result'], range(1, pages_count)))
         else:
-            break
+            results.extend(get_page(p)['result'] for p in range(1, pages_count))
+    else:
+        # older Superset versions may not report the count, walk the pages until an empty one
+        while results[-1]:
+            results.append(get_page(len(results))['result'])
+
+    datasets = {}  # keyed by dataset key, to catch duplicates
+    for result in results:
+        page_datasets = [
+            {
+                'id': r['id'],
+                'key': f"{r['schema']}.{r['table_name']}",  # used as unique identifier
+                'changed_on': r.get('changed_on_utc')
+            }
+            for r in result
+            if r['kind'] == 'physical' and (superset_db_id is None or r['database']['id'] == superset_db_id)
+        ]
+        if dataset_filter:
+            page_datasets = [d for d in page_datasets if dataset_filter in d['key']]
+
+        # fail if it breaks uniqueness constraint
+        page_keys = collections.Counter(d['key'] for d in page_datasets)
+        duplicates = sorted(k for k, n in page_keys.items() if n > 1 or k in datasets)
+        assert not duplicates, \
+            f"Datasets {duplicates} are duplicate names (schema + table) " \
+            "across databases. " \
+            "This would result in incorrect matching between Superset and dbt. " \
+            "To fix this, remove duplicates or add the ``superset_db_id`` argument."
+
+        datasets.update((d['key'], d) for d in page_datasets)
+
+    if logger.isEnabledFor(logging.DEBUG):
+        for dataset in datasets.values():
+            logger.debug("Matched %s for db id %s due to schema filter: `%s`",
+                         dataset['key'], dataset['id'], dataset_filter)
 
     assert datasets, "There are no datasets in Superset!"
 
-    return datasets
+    return list(datasets.values())
+
+def load_json_file(path):
+    with open(path, 'rb') as f:
+        content = f.read()
+
+    # orjson parses large dbt artifacts considerably faster, if available
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def dump_json_file(obj, path):
+    # write next to the target and swap it in, so a failed dump never leaves a truncated file behind
+    tmp_path = f'{path}.tmp'
+    if orjson is not None:
+        with open(tmp_path, 'wb') as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+    else:
+        # same layout as the orjson output, so the file doesn't depend on what is installed
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(obj, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def load_manifest_tables(path):
+    """Loads only the nodes and sources info of a dbt manifest needed by ``get_tables_from_dbt``.
+
+    With ijson installed (and orjson not), the manifest is streamed so that the rest of it is never
+    held in memory. This trades time for memory, orjson decodes the whole file about twice as fast.
+    """
+
+    if ijson is None or orjson is not None:
+        return load_json_file(path)
+
+    dbt_manifest = {}
+    for table_type in ['nodes', 'sources']:
+        with open(path, 'rb') as f:
+            dbt_manifest[table_type] = {
+                table_key_long: {field: table[field]
+                                 for field in ['name', 'schema', 'database', 'columns', 'description']}
+                for table_key_long, table in ijson.kvitems(f, table_type)
+            }
+
+    return dbt_manifest
+
 
 def update_dbt_with_default_desc(dbt_manifest, dbt_catalog, default_descriptions):
     default_column_descs = default_descriptions.get('columns', {})
+    added_count = 0
 
     for table_type in ['nodes', 'sources']:
         manifest_subset = dbt_manifest[table_type]
         catalog_subset = dbt_catalog[table_type]
 
         # catalog lists all tables and columns, manifest only contains a subset
-        for table_key_long in catalog_subset:
-            catalog_table = catalog_subset[table_key_long]
+        for table_key_long, catalog_table in catalog_subset.items():
             catalog_table_name = catalog_table['metadata']['name']
             catalog_table_columns = catalog_table['columns']
 
+            manifest_table = manifest_subset.get(table_key_long)
             # create table in manifest if it doesn't exist
-            if table_key_long not in manifest_subset:
-                manifest_subset[table_key_long] = {
+            if manifest_table is None:
+                manifest_table = manifest_subset[table_key_long] = {
                     'name': catalog_table_name,
                     'schema': catalog_table['metadata']['schema'],
                     'database': catalog_table['metadata']['database'],
@@ -97,51 +172,46 @@ def update_dbt_with_default_desc(dbt_manifest, dbt_catalog, default_descriptions
                     'columns': {}
                 }
 
-            manifest_table = manifest_subset[table_key_long]
             manifest_table_columns = manifest_table['columns']
 
-            for catalog_column in catalog_table_columns:
-                logging.debug(f'Processing for dbt catalog table {catalog_table_name} - {catalog_column}')
-                if catalog_column not in manifest_table_columns and catalog_column in default_column_descs:
-                    # add column with the default description
-                    logging.info(f'Adding default desc for {catalog_table_name} - {catalog_column}')
-                    manifest_subset[table_key_long]['columns'][catalog_column] = {
-                        "name": catalog_column,
-                        "description": default_column_descs[catalog_column]['desc'],
-                        "meta": {},
-                        "data_type": None,
-                        "quote": None,
-                        "tags": []
-                    }
-
-        dbt_manifest[table_type] = manifest_subset
+            # there are usually far fewer default columns than table columns, so go over those
+            # (in yaml order, which keeps the written manifest stable)
+            for column_name in default_column_descs:
+                if column_name not in catalog_table_columns or column_name in manifest_table_columns:
+                    continue
+                # add column with the default description
+                logger.info('Adding default desc for %s - %s', catalog_table_name, column_name)
+                manifest_table_columns[column_name] = {
+                    "name": column_name,
+                    "description": default_column_descs[column_name]['desc'],
+                    "meta": {},
+                    "data_type": None,
+                    "quote": None,
+                    "tags": []
+                }
+                added_count += 1
 
-    return dbt_manifest
+    logger.info("Added %d default column descriptions to the dbt manifest.", added_count)
+
+    return dbt_manifest, added_count > 0
 
 def get_tables_from_dbt(dbt_manifest, dbt_db_name):
     tables = {}
     for table_type in ['nodes', 'sources']:
-        manifest_subset = dbt_manifest[table_type]
-
-        for table_key_long in manifest_subset:
-            table = manifest_subset[table_key_long]
-            name = table['name']
-            schema = table['schema']
-            database = table['database']
+        for table in dbt_manifest[table_type].values():
+            if dbt_db_name is not None and table['database'] != dbt_db_name:
+                continue
 
-            table_key_short = schema + '.' + name
-            columns = table['columns']
-            description = table['description']
+            table_key_short = table['schema'] + '.' + table['name']
 
-            if dbt_db_name is None or database == dbt_db_name:
-                # fail if it breaks uniqueness constraint
-                assert table_key_short not in tables, \
-                    f"Table {table_key_short} is a duplicate name (schema + table) " \
-                    f"across databases. " \
-                    "This would result in incorrect matching between Superset and dbt. " \
-                    "To fix this, remove duplicates or add the ``dbt_db_name`` argument."
+            # fail if it breaks uniqueness constraint
+            assert table_key_short not in tables, \
+                f"Table {table_key_short} is a duplicate name (schema + table) " \
+                f"across databases. " \
+                "This would result in incorrect matching between Superset and dbt. " \
+                "To fix this, remove duplicates or add the ``dbt_db_name`` argument."
 
-                tables[table_key_short] = {'columns': columns, 'description': description}
+            tables[table_key_short] = {'columns': table['columns'], 'description': table['description']}
 
     assert tables, "Manifest is empty!"
 
@@ -154,16 +224,47 @@ def get_default_column_desc(default_descriptions_yaml_path):
     else:
         return {}
 
+def load_datasets_cache(cache_path, superset_url):
+    """Loads the Superset state of datasets seen in previous runs, keyed by dataset ID."""
+
+    if not os.path.exists(cache_path):
+        return {}
+
+    cache = load_json_file(cache_path)
+    if cache.get('superset_url') != superset_url:
+        logger.info("Ignoring datasets cache at %s since it was created for another Superset.", cache_path)
+        return {}
+
+    return cache['datasets']
+
+
+def save_datasets_cache(cache_path, superset_url, datasets_cache):
+    dump_json_file({'superset_url': superset_url, 'datasets': datasets_cache}, cache_path)
+
+
+def get_datasets_cache_entry(dataset):
+    return {
+        'changed_on': dataset['changed_on'],
+        'columns': [{
+            'column_name': col['column_name'],
+            'id': col['id'],
+            'description': col['description'],
+            'expression': col['expression']
+        } for col in dataset['columns']],
+        'description': dataset['description'],
+        'owners': [{'id': owner['id']} for owner in dataset['owners']]
+    }
+
+
 def refresh_columns_in_superset(superset, dataset_id):
-    logging.info("Refreshing columns in Superset.")
+    logger.info("Refreshing columns in Superset.")
     superset.request('PUT', f'/dataset/{dataset_id}/refresh')
 
 
-def add_superset_columns(superset, dataset):
-    logging.info("Pulling fresh columns info from Superset.")
-
-    res = superset.request('GET', f"/dataset/{dataset['id']}")
-    result = res['result']
+def add_superset_columns(superset, dataset, result=None):
+    if result is None:
+        logger.info("Pulling fresh columns info from Superset.")
+        result = superset.request('GET', f"/dataset/{dataset['id']}")['result']
 
     dataset['columns'] = result['columns']
     dataset['description'] = result['description']
@@ -172,30 +273,54 @@ def add_superset_columns(superset, dataset):
     return dataset
 
 
+class _TextExtractor(html.parser.HTMLParser):
+    """Collects all text content of an HTML snippet, like BeautifulSoup's ``findAll(text=True)`` did."""
+
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+
+    def handle_data(self, data):
+        self.parts.append(data)
+
+    def handle_comment(self, data):
+        self.parts.append(data)
+
+    def handle_decl(self, decl):
+        self.parts.append(decl[len('DOCTYPE '):] if decl.upper().startswith('DOCTYPE ') else decl)
+
+    def handle_pi(self, data):
+        self.parts.append(data)
+
+    def unknown_decl(self, data):
+        if data.startswith('CDATA['):
+            self.parts.append(data[len('CDATA['):])
+
+
+@functools.lru_cache(maxsize=4096)
 def convert_markdown_to_plain_text(md_string):
     """Converts a markdown string to plaintext.
 
-    The following solution is used:
-    https://gist.github.com/lorey/eb15a7f3338f959a78cc3661fbc255fe
+    Markdown is rendered to HTML, from which the text is extracted.
+    Results are cached as the same descriptions (e.g. default ones) repeat across many columns.
     """
 
-    # md -> html -> text since BeautifulSoup can extract text cleanly
-    html = markdown(md_string)
+    html_string = markdown(md_string)
 
     # remove code snippets
-    html = re.sub(r'<pre>(.*?)</pre>', ' ', html)
-    html = re.sub(r'<code>(.*?)</code >', ' ', html)
+    html_string = _PRE_RE.sub(' ', html_string)
 
     # extract text
-    soup = BeautifulSoup(html, 'html.parser')
-    text = ''.join(soup.findAll(text=True))
+    extractor = _TextExtractor()
+    extractor.feed(html_string)
+    extractor.close()
+    text = ''.join(extractor.parts)
 
     # make one line
-    single_line = re.sub(r'\s+', ' ', text)
+    single_line = _WS_RE.sub(' ', text)
 
     # make fixes
-    single_line = re.sub('→', '->', single_line)
-    single_line = re.sub('<null>', '"null"', single_line)
+    single_line = _TEXT_FIXES_RE.sub(lambda m: _TEXT_FIXES[m.group(0)], single_line)
 
     return single_line
 
@@ -204,47 +329,56 @@ def merge_columns_info(dataset, tables, default_descriptions):
 
     key = dataset['key']
     sst_columns = dataset['columns']
-    dbt_columns = tables.get(key, {}).get('columns', {})
+    dbt_table = tables.get(key, {})
+    dbt_columns = dbt_table.get('columns', {})
     default_column_descs = default_descriptions.get('columns', {})
 
     sst_description = dataset['description']
-    dbt_description = tables.get(key, {}).get('description')
+    dbt_description = dbt_table.get('description')
 
     sst_owners = dataset['owners']
 
-    columns_new = []
-    for sst_column in sst_columns:
-
-        column_name = sst_column['column_name']
-
-        # add the mandatory fields
-        column_new = {
-            'column_name': column_name,
-            'id': sst_column['id']
-        }
-
-        # add column descriptions
-        description = sst_column['description']
-        # ensure database column
-        if sst_column['expression'] is None or sst_column['expression'] == '':
-            if column_name in dbt_columns and 'description' in dbt_columns[column_name]:
-                description = convert_markdown_to_plain_text(
-                    dbt_columns[column_name]['description']
-                )
-            # fallback to default descriptions defined in yaml file
-            elif column_name in default_column_descs and 'desc' in default_column_descs[column_name]:
-                description = convert_markdown_to_plain_text(
-                    default_column_descs[column_name]['desc']
-                )
-
-        column_new['description'] = description
-
-        columns_new.append(column_new)
+    if not dbt_columns and not default_column_descs:
+        # nothing to merge in, keep the Superset descriptions
+        columns_new = [{
+            'column_name': sst_column['column_name'],
+            'id': sst_column['id'],
+            'description': sst_column['description']
+        } for sst_column in sst_columns]
+    else:
+        columns_new = []
+        for sst_column in sst_columns:
+
+            column_name = sst_column['column_name']
+
+            # add the mandatory fields
+            column_new = {
+                'column_name': column_name,
+                'id': sst_column['id']
+            }
+
+            # add column descriptions
+            description = sst_column['description']
+            # ensure database column
+            if sst_column['expression'] is None or sst_column['expression'] == '':
+                # an empty description in dbt (e.g. a column only listed for tests) means undocumented
+                dbt_column_description = dbt_columns.get(column_name, {}).get('description')
+                if dbt_column_description:
+                    description = convert_markdown_to_plain_text(dbt_column_description)
+                # fallback to default descriptions defined in yaml file
+                elif column_name in default_column_descs and 'desc' in default_column_descs[column_name]:
+                    description = convert_markdown_to_plain_text(
+                        default_column_descs[column_name]['desc']
+                    )
+
+            column_new['description'] = description
+
+            columns_new.append(column_new)
 
     dataset['columns_new'] = columns_new
 
-    # add dataset description
-    if dbt_description is None:
+    # add dataset description, an empty one in dbt means undocumented rather than blank
+    if not dbt_description:
         dataset['description_new'] = sst_description
     else:
         dataset['description_new'] = convert_markdown_to_plain_text(dbt_description)
@@ -256,44 +390,97 @@ def merge_columns_info(dataset, tables, default_descriptions):
 
 
 def check_columns_equal(lst1, lst2):
-    return sorted(lst1, key=lambda c: c["id"]) == sorted(lst2, key=lambda c: c["id"])
+    # only descriptions are updated, identified by column IDs
+    return {(c['id'], c.get('description')) for c in lst1} == {(c['id'], c.get('description')) for c in lst2}
 
 
 def pause_after_update(superset_pause_after_update):
     if superset_pause_after_update:
-        logging.info("Pausing the script for %d seconds to allow for databases to catch up with the update.",
-                     superset_pause_after_update)
+        logger.info("Pausing the script for %d seconds to allow for databases to catch up with the update.",
+                    superset_pause_after_update)
         time.sleep(superset_pause_after_update)
-        logging.info("Resuming the script again.")
-
-
-def put_descriptions_to_superset(superset, dataset, superset_pause_after_update):
-    logging.info("Putting model and column descriptions into Superset.")
+        logger.info("Resuming the script again.")
 
-    description_new = dataset['description_new']
-    columns_new = dataset['columns_new']
-    owners_new = dataset['owners_new']
 
-    description_old = dataset['description']
+def check_dataset_changed(dataset):
     columns_old = [{
         'column_name': col['column_name'],
         'id': col['id'],
         'description': col['description']
     } for col in dataset['columns']]
 
-    if description_new != description_old or \
-       not check_columns_equal(columns_new, columns_old):
-        payload = {'description': description_new, 'columns': columns_new, 'owners': owners_new}
-        logging.info(f"Adding new descriptions for dataset {dataset['key']}")
-        superset.request('PUT', f"/dataset/{dataset['id']}?override_columns=false", json=payload)
-        pause_after_update(superset_pause_after_update)
-    else:
-        logging.info("Skipping PUT execute request as nothing would be updated.")
+    # owners are passed through unchanged, so they never make a dataset dirty
+    return dataset['description_new'] != dataset['description'] \
+        or not check_columns_equal(dataset['columns_new'], columns_old)
+
+
+def put_descriptions_to_superset(superset, dataset, superset_pause_after_update):
+    logger.info("Putting model and column descriptions into Superset.")
+
+    # all columns have to be sent, Superset deletes the ones missing from the payload
+    payload = {
+        'description': dataset['description_new'],
+        'columns': dataset['columns_new'],
+        'owners': dataset['owners_new']
+    }
+    logger.info("Adding new descriptions for dataset %s", dataset['key'])
+    superset.request('PUT', f"/dataset/{dataset['id']}?override_columns=false", json=payload)
+    pause_after_update(superset_pause_after_update)
+
+
+def map_datasets(func, datasets, concurrency):
+    """Calls ``func(i, dataset)`` for each dataset, in a thread pool if ``concurrency`` allows."""
+
+    if concurrency > 1 and len(datasets) > 1:
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(datasets))) as executor:
+            return list(executor.map(func, range(len(datasets)), datasets))
+    return [func(i, dataset) for i, dataset in enumerate(datasets)]
+
+
+def prepare_dataset(superset, sst_dataset, i, datasets_count, dbt_tables, default_descriptions,
+                    superset_refresh_columns, superset_pause_after_update, superset_fixed_pause,
+                    datasets_cache=None):
+    logger.info("Processing dataset %d/%d.", i + 1, datasets_count)
+    sst_dataset_id = sst_dataset['id']
+    try:
+        result = None
+        if superset_refresh_columns:
+            refresh_columns_in_superset(superset, sst_dataset_id)
+            # the refresh is done once Superset responds, the columns pulled next already reflect it
+            if superset_fixed_pause:
+                pause_after_update(superset_pause_after_update)
+        elif datasets_cache is not None and sst_dataset['changed_on'] is not None:
+            cached = datasets_cache.get(str(sst_dataset_id))
+            if cached is not None and cached['changed_on'] == sst_dataset['changed_on']:
+                logger.info("Using cached columns info as the dataset didn't change in Superset since the previous run.")
+                result = cached
+        sst_dataset_w_cols = add_superset_columns(superset, sst_dataset, result)
+        if datasets_cache is not None and sst_dataset['changed_on'] is not None:
+            datasets_cache[str(sst_dataset_id)] = get_datasets_cache_entry(sst_dataset_w_cols)
+        return merge_columns_info(sst_dataset_w_cols, dbt_tables, default_descriptions)
+    except HTTPError as e:
+        logger.error("The dataset with ID=%d wasn't updated. Check the error below.",
+                     sst_dataset_id, exc_info=e)
+        return None
+
+
+def push_dataset(superset, dataset, i, datasets_count, superset_pause_after_update, datasets_cache=None):
+    logger.info("Pushing dataset %d/%d.", i + 1, datasets_count)
+    try:
+        put_descriptions_to_superset(superset, dataset, superset_pause_after_update)
+    except HTTPError as e:
+        logger.error("The dataset with ID=%d wasn't updated. Check the error below.",
+                     dataset['id'], exc_info=e)
+    finally:
+        # the dataset changes (or may have) in Superset, so its cached state is outdated
+        if datasets_cache is not None:
+            datasets_cache.pop(str(dataset['id']), None)
 
 
 def main(dbt_project_dir, dbt_db_name, superset_url, superset_db_id,
          dataset_filter, superset_refresh_columns, superset_pause_after_update,
-         default_descriptions_yaml_path, username, password):
+         default_descriptions_yaml_path, username, password, concurrency=1, superset_fixed_pause=False,
+         superset_cache=False):
 
     # require creds
     assert username is not None or superset_refresh_token is not None, \
@@ -301,48 +488,86 @@ def main(dbt_project_dir, dbt_db_name, superset_url, superset_db_id,
            "to your environment variables or provide in CLI " \
            "via ``username`` or ``password``."
 
-    logging.info("Starting the script!")
+    logger.info("Starting the script!")
 
+    # one pooled connection per worker thread, otherwise urllib3 discards the surplus ones
     superset = Superset(superset_url + '/api/v1',
-                        username=username, password=password)
+                        username=username, password=password,
+                        pool_maxsize=max(20, concurrency))
 
-    sst_datasets = get_datasets_from_superset(superset, superset_db_id, dataset_filter)
-    logging.info("There are %d physical datasets in Superset overall.", len(sst_datasets))
+    sst_datasets = get_datasets_from_superset(superset, superset_db_id, dataset_filter, concurrency)
+    logger.info("There are %d physical datasets in Superset overall.", len(sst_datasets))
 
-    with open(f'{dbt_project_dir}/target/manifest.json') as f:
-        dbt_manifest = json.load(f)
+    # Superset state of unchanged datasets is reused from previous runs instead of fetching it again
+    datasets_cache_path = f'{dbt_project_dir}/.dbt-superset-cache.json'
+    datasets_cache = load_datasets_cache(datasets_cache_path, superset_url) if superset_cache else None
 
     # update dbt docs with default descriptions in manifest first
     # TODO: potentially no need to apply default descs again when pushing to superset
     #       see put_descriptions_to_superset
     default_descriptions = get_default_column_desc(default_descriptions_yaml_path)
-    if default_descriptions:
-        with open(f'{dbt_project_dir}/target/catalog.json') as f:
-            dbt_catalog = json.load(f)
-        updated_dbt_manifest = update_dbt_with_default_desc(dbt_manifest, dbt_catalog, default_descriptions)
-        logging.info("Updating Dbt manifest with default descriptions")
-        with open(f'{dbt_project_dir}/target/manifest.json', 'w') as f:
-            json.dump(updated_dbt_manifest, f, indent=4)
+    if not default_descriptions:
+        # the manifest isn't rewritten, only its tables are needed
+        dbt_manifest = load_manifest_tables(f'{dbt_project_dir}/target/manifest.json')
+    else:
+        dbt_manifest = load_json_file(f'{dbt_project_dir}/target/manifest.json')
+        dbt_catalog = load_json_file(f'{dbt_project_dir}/target/catalog.json')
+        updated_dbt_manifest, modified = update_dbt_with_default_desc(dbt_manifest, dbt_catalog,
+                                                                      default_descriptions)
+        # tables only added from the catalog carry no descriptions, rewriting the file isn't worth it then
+        if modified:
+            logger.info("Updating Dbt manifest with default descriptions")
+            dump_json_file(updated_dbt_manifest, f'{dbt_project_dir}/target/manifest.json')
         dbt_manifest = updated_dbt_manifest
 
     # push desc to superset
     dbt_tables = get_tables_from_dbt(dbt_manifest, dbt_db_name)
 
-    sst_datasets_dbt_filtered = [d for d in sst_datasets if d["key"] in dbt_tables]
-    logging.info("There are %d physical datasets in Superset with a match in dbt.", len(sst_datasets_dbt_filtered))
-
-    for i, sst_dataset in enumerate(sst_datasets_dbt_filtered):
-        logging.info("Processing dataset %d/%d.", i + 1, len(sst_datasets_dbt_filtered))
-        sst_dataset_id = sst_dataset['id']
-        try:
-            if superset_refresh_columns:
-                refresh_columns_in_superset(superset, sst_dataset_id)
-                pause_after_update(superset_pause_after_update)
-            sst_dataset_w_cols = add_superset_columns(superset, sst_dataset)
-            sst_dataset_w_cols_new = merge_columns_info(sst_dataset_w_cols, dbt_tables, default_descriptions)
-            put_descriptions_to_superset(superset, sst_dataset_w_cols_new, superset_pause_after_update)
-        except HTTPError as e:
-            logging.error("The dataset with ID=%d wasn't updated. Check the error below.",
-                          sst_dataset_id, exc_info=e)
-
-    logging.info("All done!")
+    dbt_keys = dbt_tables.keys()
+    sst_datasets_dbt_filtered = [d for d in sst_datasets if d["key"] in dbt_keys]
+    logger.info("There are %d physical datasets in Superset with a match in dbt.", len(sst_datasets_dbt_filtered))
+
+    # dbt tables without any descriptions have nothing to push, so avoid fetching their datasets at all
+    if not default_descriptions and not superset_refresh_columns:
+        trivial_keys = {k for k, v in dbt_tables.items()
+                        if not v.get('description')
+                        and not any(c.get('description') for c in v.get('columns', {}).values())}
+        sst_datasets_dbt_filtered = [d for d in sst_datasets_dbt_filtered if d["key"] not in trivial_keys]
+        logger.info("There are %d of these datasets with descriptions in dbt.", len(sst_datasets_dbt_filtered))
+
+    prepare_concurrency = concurrency
+    if concurrency > 1 and superset_refresh_columns and superset_fixed_pause and superset_pause_after_update:
+        logger.warning("Refreshing columns one dataset at a time since there is a pause after each refresh.")
+        prepare_concurrency = 1
+
+    datasets_count = len(sst_datasets_dbt_filtered)
+    sst_datasets_merged = map_datasets(
+        lambda i, d: prepare_dataset(superset, d, i, datasets_count, dbt_tables, default_descriptions,
+                                     superset_refresh_columns, superset_pause_after_update, superset_fixed_pause,
+                                     datasets_cache),
+        sst_datasets_dbt_filtered, prepare_concurrency
+    )
+
+    # only datasets with new info are pushed, the PUTs (and pauses after them) may overlap
+    sst_datasets_changed = [d for d in sst_datasets_merged if d is not None and check_dataset_changed(d)]
+    logger.info("There are %d datasets with new descriptions to push, skipping the rest as nothing would "
+                "be updated.", len(sst_datasets_changed))
+
+    # Superset applies the update before responding, so only pause if asked to explicitly
+    pause_after_put = superset_pause_after_update if superset_fixed_pause else 0
+    changed_count = len(sst_datasets_changed)
+    map_datasets(
+        lambda i, d: push_dataset(superset, d, i, changed_count, pause_after_put, datasets_cache),
+        sst_datasets_changed, concurrency
+    )
+
+    if datasets_cache is not None:
+        # forget datasets which are gone from Superset, only known when all of them were listed
+        if not dataset_filter and superset_db_id is None:
+            sst_dataset_ids = {str(d['id']) for d in sst_datasets}
+            datasets_cache = {k: v for k, v in datasets_cache.items() if k in sst_dataset_ids}
+        save_datasets_cache(datasets_cache_path, superset_url, datasets_cache)
+        logger.info("Saved Superset state of %d datasets to %s.", len(datasets_cache), datasets_cache_path)
+
+    superset.close()
+    logger.info("All done!")
@@ -1,6 +1,9 @@
 import logging
+import threading
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 
@@ -8,13 +11,15 @@ logger = logging.getLogger(__name__)
 class Superset:
     """A class for accessing the Superset API in an easy way."""
 
-    def __init__(self, api_url, username, password):
+    def __init__(self, api_url, username, password, pool_maxsize=20):
         """Instantiates the class.
 
         Args:
             api_url: Base API URL of a Superset instance, e.g. https://my-superset/api/v1.
             username: Superset username added to local db (check `superset fab` cli)
             password: password for the Superset user
+            pool_maxsize: Number of connections kept open, should cover the number of threads
+                sharing the instance.
         """
 
         self.api_url = api_url
@@ -23,10 +28,26 @@ class Superset:
         self.access_token = None
         self.refresh_token = None
         self.csrf_token = ''
-        self.cookies = {}
+        self._refresh_lock = threading.Lock()
+
+        # reuse connections across the many (paginated) API calls instead of
+        # paying a fresh TCP + TLS handshake for every request
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=pool_maxsize,
+                              max_retries=Retry(total=3, backoff_factor=0.3,
+                                                status_forcelist=[502, 503, 504],
+                                                allowed_methods=['GET', 'PUT', 'POST'],
+                                                # hand the last response to ``raise_for_status`` for an HTTPError
+                                                raise_on_status=False))
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
 
         self._login()
 
+    def close(self):
+        """Closes the underlying HTTP session and its pooled connections."""
+        self._session.close()
+
     def _login(self):
         auth_payload = {"username": self.username,
                         "password": self.password,
@@ -37,6 +58,7 @@ class Superset:
                            refresh_token_if_needed=False)
         self.access_token = res['access_token']
         self.refresh_token = res['refresh_token']
+        self._session.headers['Authorization'] = f'Bearer {self.access_token}'
         self._csrf_token()
 
         logger.debug("Login successful")
@@ -44,33 +66,31 @@ class Superset:
     def _csrf_token(self):
         res = self.request('GET', '/security/csrf_token')
         self.csrf_token = res['result']
+        self._session.headers['X-CSRFToken'] = self.csrf_token
 
         logger.debug("Fetched csrf token")
 
-    def _headers(self, **headers):
-        if self.access_token is None:
-            return headers
-
-        return {
-            'Authorization': f'Bearer {self.access_token}',
-            'X-CSRFToken': self.csrf_token,
-            **headers,
-        }
+    def _refresh_access_token(self, expired_access_token=None):
+        # concurrent requests may all hit an expired token, only one of them should refresh it
+        with self._refresh_lock:
+            if expired_access_token is not None and self.access_token != expired_access_token:
+                logger.debug("API token already refreshed by another request")
+                return True
 
-    def _refresh_access_token(self):
-        logger.debug("Refreshing API token")
+            logger.debug("Refreshing API token")
 
-        if self.refresh_token is None:
-            logging.warning("Cannot refresh access_token, refresh_token is None")
-            return False
+            if self.refresh_token is None:
+                logger.warning("Cannot refresh access_token, refresh_token is None")
+                return False
 
-        res = self.request('POST', '/security/refresh',
-                           headers={'Authorization': f'Bearer {self.refresh_token}'},
-                           refresh_token_if_needed=False)
-        self.access_token = res['access_token']
+            res = self.request('POST', '/security/refresh',
+                               headers={'Authorization': f'Bearer {self.refresh_token}'},
+                               refresh_token_if_needed=False)
+            self.access_token = res['access_token']
+            self._session.headers['Authorization'] = f'Bearer {self.access_token}'
 
-        logger.debug("Token refreshed successfully")
-        return True
+            logger.debug("Token refreshed successfully")
+            return True
 
     def request(self, method, endpoint, refresh_token_if_needed=True, headers=None,
                 **request_kwargs):
@@ -81,8 +101,8 @@ class Superset:
             endpoint: Endpoint to use.
             refresh_token_if_needed: Whether the ``access_token`` should be automatically refreshed
                 if needed.
-            headers: Additional headers to use.
-            **request_kwargs: Any ``requests.request`` arguments to use.
+            headers: Additional headers to use, on top of the session-wide auth headers.
+            **request_kwargs: Any ``requests.Session.request`` arguments to use.
 
         Returns:
             A dictionary containing response body parsed from JSON.
@@ -94,24 +114,18 @@ class Superset:
 
         logger.info("About to %s execute request for endpoint %s", method, endpoint)
 
-        if headers is None:
-            headers = {}
-
         url = self.api_url + endpoint
-        res = requests.request(method, url, headers=self._headers(**headers), cookies=self.cookies,
-                               **request_kwargs)
+        access_token = self.access_token
+        # auth headers and cookies are kept on the session, ``requests`` merges them with ``headers``
+        res = self._session.request(method, url, headers=headers, **request_kwargs)
 
         logger.debug("Request finished with status: %d", res.status_code)
 
         if refresh_token_if_needed and res.status_code == 401 \
-                and res.json().get('msg') == 'Token has expired' and self._refresh_access_token():
-            logger.debug("Retrying %s request for endpoint %s with refreshed token")
-            res = requests.request(method, url, headers=self._headers(**headers))
+                and res.json().get('msg') == 'Token has expired' and self._refresh_access_token(access_token):
+            logger.debug("Retrying %s request for endpoint %s with refreshed token", method, endpoint)
+            res = self._session.request(method, url, headers=headers, **request_kwargs)
             logger.debug("Request finished with status: %d", res.status_code)
 
-        # implicitly store cookies, ideally should be explicit
-        if res.cookies:
-            self.cookies = res.cookies.get_dict()
-
         res.raise_for_status()
         return res.json()
@@ -0,0 +1,135 @@
+import json
+import re
+from unittest import mock
+
+from dbt_superset.push_descriptions import convert_markdown_to_plain_text, merge_columns_info, main
+from dbt_superset.superset_api import Superset
+
+
+def test_inline_code():
+    assert convert_markdown_to_plain_text("Use `foo_id` instead.") == "Use foo_id instead."
+
+
+def test_fenced_code():
+    assert convert_markdown_to_plain_text("```\nselect 1\n```\nafter") == "select 1 after"
+
+
+def test_indented_code():
+    md_string = "Example:\n\n    select *\n    from orders\n\nafter"
+    assert convert_markdown_to_plain_text(md_string) == "Example: select * from orders after"
+
+
+def test_single_line_pre_removed():
+    assert convert_markdown_to_plain_text("<pre>raw</pre> tail") == " tail"
+
+
+def test_script_text_kept():
+    assert convert_markdown_to_plain_text("<script>var x = 1;</script> after") == "var x = 1; after"
+
+
+def test_escaped_null():
+    assert convert_markdown_to_plain_text("x &lt;null&gt; y") == 'x "null" y'
+
+
+def test_arrow():
+    assert convert_markdown_to_plain_text("A → B") == "A -> B"
+
+
+def test_markup_and_newlines_flattened():
+    md_string = "**Deprecated**: use `foo_id`.\n\nSee [docs](https://example.com)."
+    assert convert_markdown_to_plain_text(md_string) == "Deprecated: use foo_id. See docs."
+
+
+def test_merge_keeps_superset_description_for_empty_dbt_description():
+    dataset = {
+        'key': 'schema.table',
+        'description': 'table in superset',
+        'owners': [{'id': 1}],
+        'columns': [
+            {'column_name': 'tested', 'id': 10, 'description': 'in superset', 'expression': None},
+            {'column_name': 'defaulted', 'id': 11, 'description': None, 'expression': None},
+            {'column_name': 'documented', 'id': 12, 'description': None, 'expression': None},
+        ]
+    }
+    tables = {'schema.table': {'description': '', 'columns': {
+        'tested': {'description': ''},
+        'defaulted': {'description': ''},
+        'documented': {'description': 'in dbt'},
+    }}}
+    default_descriptions = {'columns': {'defaulted': {'desc': 'by default'}}}
+
+    merged = merge_columns_info(dataset, tables, default_descriptions)
+
+    assert merged['description_new'] == 'table in superset'
+    assert [c['description'] for c in merged['columns_new']] == ['in superset', 'by default', 'in dbt']
+    assert merged['owners_new'] == [1]
+
+
+class FakeSupersetApi:
+    """In-memory stand-in for ``Superset.request``, recording the dataset GETs and PUTs."""
+
+    def __init__(self):
+        self.datasets = {
+            1: {'table_name': 'documented', 'description': None, 'changed_on': 't0',
+                'columns': [{'column_name': 'a', 'id': 11, 'description': None, 'expression': None}]},
+            2: {'table_name': 'pushed', 'description': 'in dbt', 'changed_on': 't0',
+                'columns': [{'column_name': 'a', 'id': 21, 'description': 'doc a', 'expression': None}]},
+        }
+        self.calls = []
+
+    def request(self, method, endpoint, refresh_token_if_needed=True, headers=None, **request_kwargs):
+        if endpoint == '/security/login':
+            return {'access_token': 'access', 'refresh_token': 'refresh'}
+        if endpoint == '/security/csrf_token':
+            return {'result': 'csrf'}
+        if endpoint == '/dataset/':
+            return {'count': len(self.datasets), 'result': [
+                {'id': i, 'kind': 'physical', 'database': {'id': 1}, 'schema': 's',
+                 'table_name': d['table_name'], 'changed_on_utc': d['changed_on']}
+                for i, d in self.datasets.items()
+            ]}
+
+        dataset_id = int(re.match(r'/dataset/(\d+)', endpoint).group(1))
+        self.calls.append((method, dataset_id))
+        dataset = self.datasets[dataset_id]
+        if method == 'GET':
+            return {'result': {'columns': [dict(c) for c in dataset['columns']],
+                               'description': dataset['description'], 'owners': [{'id': 7}]}}
+
+        payload = request_kwargs['json']
+        dataset['description'] = payload['description']
+        descriptions = {c['id']: c['description'] for c in payload['columns']}
+        for column in dataset['columns']:
+            column['description'] = descriptions[column['id']]
+        dataset['changed_on'] = 't1'
+        return {'result': {}}
+
+
+def test_datasets_cache(tmp_path):
+    (tmp_path / 'target').mkdir()
+    manifest = {'nodes': {
+        'model.p.documented': {'name': 'documented', 'schema': 's', 'database': 'd', 'description': 'model doc',
+                               'columns': {'a': {'description': 'col doc'}}},
+        'model.p.pushed': {'name': 'pushed', 'schema': 's', 'database': 'd', 'description': 'in dbt',
+                           'columns': {'a': {'description': 'doc a'}}},
+    }, 'sources': {}}
+    (tmp_path / 'target' / 'manifest.json').write_text(json.dumps(manifest))
+    cache_path = tmp_path / '.dbt-superset-cache.json'
+
+    api = FakeSupersetApi()
+
+    def run():
+        api.calls.clear()
+        main(str(tmp_path), None, 'https://superset', None, None, False, 0, None, 'user', 'password',
+             superset_cache=True)
+        return sorted(api.calls), sorted(json.loads(cache_path.read_text())['datasets'])
+
+    with mock.patch.object(Superset, 'request', lambda self, *args, **kwargs: api.request(*args, **kwargs)):
+        # dataset 1 is updated, so it changes in Superset and is dropped from the cache
+        assert run() == ([('GET', 1), ('GET', 2), ('PUT', 1)], ['2'])
+        # dataset 2 didn't change in Superset and is taken from the cache
+        assert run() == ([('GET', 1)], ['1', '2'])
+        assert run() == ([], ['1', '2'])
+
+    assert api.datasets[1]['description'] == 'model doc'
+    assert api.datasets[1]['columns'][0]['description'] == 'col doc'